@@ -6,27 +6,47 @@ This script automates sending messages to contacts via WhatsApp Web using Seleni
 import os
 import sys
 import time
+import re
+import codecs
+import random
 import logging
+import logging.handlers
+import queue
 import subprocess
 from pathlib import Path
 from typing import Optional, Set, Dict, Any, Union
 from dataclasses import dataclass
-import tempfile
 import shutil
-from winotify import Notification, audio
+import importlib.util
 import json
 import threading
 import http.server
 import socketserver
-import multiprocessing
+import socket
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 import keyboard
+import atexit
+import functools
+
+try:
+    import orjson  # Optional: faster progress serialization
+except ImportError:
+    orjson = None
+
+try:
+    import psutil  # Optional: kill Chrome in-process instead of spawning taskkill shells
+except ImportError:
+    psutil = None
 
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
@@ -41,13 +61,44 @@ from selenium.common.exceptions import (
 
 # Add this near the top of the file, after imports
 SESSION_RESTART_INTERVAL = 1800  # 30 minutes (change here to update everywhere)
+SKIP_WINDOW = 3  # Seconds the user has to click "Skip" on a contact's notification
 
 should_skip_event = threading.Event()
 
+# Key chords dispatched through CDP Input.dispatchKeyEvent (modifiers: 2 = Ctrl, 8 = Shift)
+CDP_KEY_EVENTS: Dict[str, Dict[str, Any]] = {
+    Keys.ENTER: {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13, "text": "\r"},
+    Keys.DELETE: {"key": "Delete", "code": "Delete", "windowsVirtualKeyCode": 46},
+    Keys.CONTROL + "a": {"key": "a", "code": "KeyA", "windowsVirtualKeyCode": 65, "modifiers": 2, "commands": ["selectAll"]},
+}
+
+# Phone number cleaning: keep digits and '+', then drop the first run of zeros
+# after a '+' country-code prefix (or any leading zeros when there is no '+')
+PHONE_JUNK_RE = re.compile(r'[^\d+]')
+PHONE_ZEROS_RE = re.compile(r'^(\+[^0]*)0+|^0+')
+
+# Error text that means the browser/driver session itself is gone, not just one element
+SESSION_ERROR_RE = re.compile(
+    r'failed to establish a new connection|max retries exceeded|actively refused|'
+    r'invalid session id|browser has closed the connection|not connected to devtools',
+    re.IGNORECASE,
+)
+# The subset that a fresh WebDriver session (rather than a retry) fixes
+SESSION_LOST_RE = re.compile(r'invalid session id|browser has closed the connection', re.IGNORECASE)
+
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 1.0) -> float:
+    """Exponential backoff delay for a retry attempt, capped and with +/-10% jitter."""
+    return min(base * (2 ** attempt), cap) * random.uniform(0.9, 1.1)
+
+@functools.lru_cache(maxsize=1)
+def _get_base_path() -> Path:
+    """Directory holding the executable (frozen) or this script, resolved once."""
+    return Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).resolve().parent
+
 def get_resource_path(relative_path: str = "") -> Path:
     """Get the absolute path to a resource file, accounting for frozen(executable) vs. non-frozen (script) environments.
     """
-    base_path = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).resolve().parent
+    base_path = _get_base_path()
     return base_path / relative_path if relative_path else base_path
 
 # Ensure log file exists before configuring logging
@@ -55,15 +106,22 @@ log_file_path = get_resource_path('whatsapp_automation.log')
 if not log_file_path.exists():
     log_file_path.touch()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file_path, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+# Configure logging: callers only enqueue records, a background listener does the file/console I/O
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+log_file_handler = logging.handlers.RotatingFileHandler(
+    log_file_path, maxBytes=10_000_000, backupCount=3, encoding='utf-8', delay=True
 )
+log_stream_handler = logging.StreamHandler()
+for handler in (log_file_handler, log_stream_handler):
+    handler.setFormatter(log_formatter)
+
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener = logging.handlers.QueueListener(log_queue, log_file_handler, log_stream_handler)
+log_listener.start()
+
+class DependencyMissing(ImportError):
+    """Raised when a package needed to read the contacts file is not installed."""
 
 @dataclass
 class Config:
@@ -80,26 +138,93 @@ class Config:
         # Other settings
         self.WAIT_TIMEOUT: int = 50  # Increased to 50 seconds
         self.LOGIN_TIMEOUT: int = 600
+        self.PAGE_LOAD_TIMEOUT: int = 10  # Bounds driver.get/refresh; readiness is gated by explicit waits
+        # Opt-in Chrome remote debugging port (e.g. 9222) that lets runs and restarts reattach to the
+        # WhatsApp Chrome instead of relaunching it. Anything on localhost can control the logged-in
+        # session through this unauthenticated port, so it stays off unless set here.
+        self.DEBUG_PORT: Optional[int] = None
         self.MAX_RETRIES: int = 5    # Increased to 5 retries
-        self.RETRY_DELAY: int = 2    # Increased to 2 seconds
+        self.RETRY_DELAY: float = 0.05    # Base delay for exponential backoff (doubles per attempt)
+        self.MAX_RETRY_DELAY: float = 1.0  # Cap on a single backoff delay
+        self.ELEMENT_WAIT_TIMEOUT: int = 5  # Upper bound for explicit waits between UI steps
+        self.POLL_INTERVAL: float = 0.1  # Explicit wait polling period; raise it if ChromeDriver resets connections
+        self.PROGRESS_FLUSH_INTERVAL: int = 16  # Write progress.json every N updates (sent.jsonl covers crashes)
+
+        # Packages needed to read each contacts file type
+        self.REQUIRED_PACKAGES: Dict[str, str] = {
+            '.xlsx': 'openpyxl',
+            '.xls': 'xlrd'
+        }
+
+        # A custom __init__ means dataclass won't call this for us
+        self.__post_init__()
 
     def __post_init__(self):
-        """Validate paths after initialization."""
-        if not os.path.exists(self.CHROME_DRIVER_PATH):
+        """Validate paths and dependencies after initialization."""
+        driver_dir, driver_name = os.path.split(os.path.abspath(self.CHROME_DRIVER_PATH))
+        contacts_dir, contacts_name = os.path.split(os.path.abspath(self.CONTACTS_FILE_PATH))
+        if os.path.normcase(driver_dir) == os.path.normcase(contacts_dir):
+            # Both live in the app directory by default; one listing answers both checks
+            try:
+                with os.scandir(driver_dir) as entries:
+                    names = {os.path.normcase(entry.name) for entry in entries}
+            except OSError:
+                names = set()
+            driver_found = os.path.normcase(driver_name) in names
+            contacts_found = os.path.normcase(contacts_name) in names
+        else:
+            driver_found = os.path.exists(self.CHROME_DRIVER_PATH)
+            contacts_found = os.path.exists(self.CONTACTS_FILE_PATH)
+
+        if not driver_found:
             logging.warning(f"Chrome driver not found at: {self.CHROME_DRIVER_PATH}. WhatsApp automation will be disabled.")
         
         if not os.path.exists(self.USER_PROFILE_PATH):
             logging.warning(f"Chrome user profile not found at: {self.USER_PROFILE_PATH}. WhatsApp automation will be disabled.")
         
-        if not os.path.exists(self.CONTACTS_FILE_PATH):
+        if not contacts_found:
             raise FileNotFoundError(f"Contacts file not found at: {self.CONTACTS_FILE_PATH}")
 
+        file_extension = os.path.splitext(self.CONTACTS_FILE_PATH)[1].lower()
+        package_name = self.REQUIRED_PACKAGES.get(file_extension)
+        if package_name and importlib.util.find_spec(package_name) is None:
+            raise DependencyMissing(
+                f"Package '{package_name}' is required to read {file_extension} files. "
+                f"Install it with: pip install {package_name}"
+            )
+
 class ProcessManager:
     """Manages browser and driver processes."""
     
     @staticmethod
-    def kill_chrome_processes() -> None:
-        """Kill all running Chrome and ChromeDriver processes."""
+    def kill_chrome_processes(user_data_dir: str) -> None:
+        """Kill the Chrome processes using user_data_dir and the ChromeDriver that started them.
+
+        Without psutil the command lines can't be inspected, so every Chrome and ChromeDriver is killed instead.
+        """
+        if psutil is not None:
+            profile_arg = os.path.normcase(f"--user-data-dir={user_data_dir}")
+            targets = {}
+            for proc in psutil.process_iter(['name', 'cmdline']):
+                if (proc.info['name'] or '').lower() != 'chrome.exe':
+                    continue
+                if profile_arg not in (os.path.normcase(arg) for arg in proc.info['cmdline'] or ()):
+                    continue
+                targets[proc.pid] = proc
+                try:
+                    parent = proc.parent()
+                    if parent is not None and parent.name().lower() == 'chromedriver.exe':
+                        targets[parent.pid] = parent
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            for proc in targets.values():
+                try:
+                    proc.kill()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            if targets:
+                logging.info(f"Closed {len(targets)} Chrome/ChromeDriver processes using the WhatsApp profile.")
+            return
         try:
             subprocess.run('taskkill /F /IM chrome.exe', check=False, shell=True, 
                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -109,61 +234,159 @@ class ProcessManager:
         except Exception as e:
             logging.warning(f"Could not kill Chrome processes: {e}")
 
+    @staticmethod
+    def is_port_open(port: int, host: str = "127.0.0.1") -> bool:
+        """Check whether something is already listening on a local port."""
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
 class WhatsAppDriver:
     """Manages the WhatsApp Web driver instance."""
+
+    # Present once the chat list has loaded and WhatsApp Web is usable
+    READY_LOCATOR = (By.CSS_SELECTOR, "button[aria-label*='New chat']")
     
     def __init__(self, config: Config):
         self.config = config
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
+        self.login_wait: Optional[WebDriverWait] = None
+        self.short_wait: Optional[WebDriverWait] = None
+        self.user_data_dir = os.path.join(config.USER_PROFILE_PATH, "WhatsApp")
+        self.attached = False  # Session attached via debuggerAddress; quit() alone leaves that Chrome running
         self.last_refresh_time = time.time()
-        self.refresh_interval = 1800  # 30 minutes in seconds
+        self.probe_interval = 60  # Seconds between liveness probes; main() restarts every SESSION_RESTART_INTERVAL
+
+    def debug_chrome_available(self) -> bool:
+        """Check that DEBUG_PORT is served by the Chrome running our WhatsApp profile, not some other browser."""
+        port = self.config.DEBUG_PORT
+        if port is None or not ProcessManager.is_port_open(port):
+            return False
+        try:
+            # Chrome records its debug port and browser endpoint in the profile it was started with
+            with open(os.path.join(self.user_data_dir, "DevToolsActivePort"), encoding="utf-8") as f:
+                active_port, browser_path = (f.read().splitlines() + ["", ""])[:2]
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+            with opener.open(f"http://127.0.0.1:{port}/json/version", timeout=1) as response:
+                ws_url = json.load(response).get("webSocketDebuggerUrl", "")
+        except (OSError, ValueError) as e:
+            logging.info(f"Not attaching to debug port {port}: {e}")
+            return False
+        if active_port != str(port) or not browser_path or not ws_url.endswith(browser_path):
+            logging.warning(f"Debug port {port} belongs to another browser; launching the WhatsApp profile instead.")
+            return False
+        return True
+
+    def is_alive(self) -> bool:
+        """Probe the session with a single script round-trip, without touching the page."""
+        try:
+            return self.driver is not None and self.driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def ready_element(self):
+        """Return the current READY_LOCATOR element without waiting, or None if the page doesn't show it."""
+        elements = self.driver.find_elements(*self.READY_LOCATOR)
+        return elements[0] if elements else None
 
     def refresh_session(self) -> bool:
-        """Refresh the Chrome session to prevent timeouts."""
+        """Recover a broken session: reload WhatsApp, or reattach to Chrome if the session is gone."""
         try:
             if self.driver:
                 logging.info("Refreshing Chrome session...")
+                previous = self.ready_element()
                 self.driver.refresh()
                 self.last_refresh_time = time.time()
-                # Wait for WhatsApp to reload
-                time.sleep(5)
+                # With page_load_strategy "none" refresh() returns at once; let the old page go before waiting for WhatsApp
+                if previous is not None:
+                    self.wait.until(EC.staleness_of(previous))
+                self.wait.until(EC.presence_of_element_located(self.READY_LOCATOR))
                 return True
             return False
         except Exception as e:
             logging.error(f"Failed to refresh session: {e}")
+        if self.is_alive():
+            # The session works; WhatsApp is just slow to come back
+            return False
+        if not self.debug_chrome_available():
+            logging.error("WhatsApp Chrome is not reachable on a debug port; cannot reattach.")
+            return False
+        try:
+            # The WebDriver session itself is dead; stop its ChromeDriver and attach a new one to Chrome
+            logging.info("Reattaching to Chrome with a new WebDriver session...")
+            try:
+                self.driver.service.stop()
+            except Exception as e:
+                logging.warning(f"Could not stop the old ChromeDriver: {e}")
+            self.driver = None
+            self.create_driver()
+            return self.initialize_whatsapp()
+        except Exception as e:
+            logging.error(f"Failed to reattach to Chrome: {e}")
             return False
 
     def check_and_refresh_session(self) -> bool:
-        """Check if session needs refresh and refresh if necessary."""
+        """Periodically probe the session and refresh it only if the probe fails."""
         current_time = time.time()
-        if current_time - self.last_refresh_time > self.refresh_interval:
-            return self.refresh_session()
+        if current_time - self.last_refresh_time > self.probe_interval:
+            self.last_refresh_time = current_time
+            if not self.is_alive():
+                return self.refresh_session()
         return True
 
     def create_driver(self) -> webdriver.Chrome:
         """Create and configure the Chrome WebDriver instance using existing user profile."""
-        ProcessManager.kill_chrome_processes()
         options = Options()
-        
-        # Configure Chrome options
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-notifications")
-        options.add_argument("--start-maximized")
-        options.add_argument("--log-level=3")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
-        
-        # Use existing Chrome user profile with proper configuration
-        user_data_dir = os.path.join(self.config.USER_PROFILE_PATH, "WhatsApp")
-        if not os.path.exists(user_data_dir):
-            os.makedirs(user_data_dir)
-        options.add_argument(f"--user-data-dir={user_data_dir}")
-        options.add_argument("--profile-directory=Default")
+
+        # Don't block on every subresource; initialize_whatsapp waits for the real UI
+        options.page_load_strategy = "none"
+        options.set_capability("timeouts", {"pageLoad": self.config.PAGE_LOAD_TIMEOUT * 1000})
+        # ChromeDriver is on localhost; keep HTTP(S)_PROXY from routing every command through a proxy
+        options.ignore_local_proxy_environment_variables()
+
+        if self.debug_chrome_available():
+            # Attach to the Chrome already running on the debug port instead of killing and relaunching it
+            logging.info(f"Attaching to running Chrome on debug port {self.config.DEBUG_PORT}")
+            options.add_experimental_option("debuggerAddress", f"127.0.0.1:{self.config.DEBUG_PORT}")
+            self.attached = True
+        else:
+            self.attached = False
+            # A Chrome left over from an earlier run or driver would hold the profile lock
+            ProcessManager.kill_chrome_processes(self.user_data_dir)
+
+            # Configure Chrome options
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--disable-extensions")
+            options.add_argument("--disable-notifications")
+            options.add_argument("--start-maximized")
+            options.add_argument("--log-level=3")
+            options.add_argument("--disable-blink-features=AutomationControlled")
+            options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            options.add_experimental_option("useAutomationExtension", False)
+            if self.config.DEBUG_PORT is not None:
+                options.add_argument(f"--remote-debugging-port={self.config.DEBUG_PORT}")
+                # Keep Chrome alive if only ChromeDriver stops, so restart_session can reattach to it
+                options.add_experimental_option("detach", True)
+
+            # Skip images and media (profile pictures, stickers); stylesheets stay on for the chat layout
+            options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.stylesheets": 1,
+                "profile.default_content_setting_values.notifications": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+            })
+            options.add_argument("--blink-settings=imagesEnabled=false")
+
+            # Use existing Chrome user profile with proper configuration
+            if not os.path.exists(self.user_data_dir):
+                os.makedirs(self.user_data_dir)
+            options.add_argument(f"--user-data-dir={self.user_data_dir}")
+            options.add_argument("--profile-directory=Default")
         
         try:
             if os.path.exists(self.config.CHROME_DRIVER_PATH):
@@ -172,21 +395,55 @@ class WhatsAppDriver:
             else:
                 self.driver = webdriver.Chrome(options=options)
                 
-            self.wait = WebDriverWait(self.driver, self.config.WAIT_TIMEOUT)
+            # Message input goes through CDP (Input.insertText); fail fast if the session can't speak it
+            version = self.cdp("Browser.getVersion")
+            logging.info(f"CDP available ({version.get('product', 'unknown browser')})")
+
+            self.wait = WebDriverWait(self.driver, self.config.WAIT_TIMEOUT, poll_frequency=self.config.POLL_INTERVAL)
+            # QR login waits on a human; the default 0.5 s polling is plenty there
+            self.login_wait = WebDriverWait(self.driver, self.config.LOGIN_TIMEOUT)
+            self.short_wait = WebDriverWait(self.driver, self.config.ELEMENT_WAIT_TIMEOUT, poll_frequency=self.config.POLL_INTERVAL)
             self.last_refresh_time = time.time()
             return self.driver
         except Exception as e:
             logging.error(f"Failed to create Chrome driver: {str(e)}")
             raise
 
+    def restart_session(self) -> bool:
+        """Swap in a fresh WebDriver session, reusing the running Chrome and its loaded WhatsApp tab.
+
+        Falls back to quitting and relaunching Chrome when DEBUG_PORT is off or Chrome is no longer reachable on it.
+        """
+        if self.driver is not None and self.debug_chrome_available():
+            try:
+                # Stop only ChromeDriver; the detached Chrome keeps running for create_driver to attach to
+                self.driver.service.stop()
+                self.driver = None
+                self.create_driver()
+                if "web.whatsapp.com" in self.driver.current_url:
+                    self.wait.until(EC.presence_of_element_located(self.READY_LOCATOR))
+                    logging.info("Reattached to the running WhatsApp Web tab.")
+                    return True
+                return self.initialize_whatsapp()
+            except Exception as e:
+                logging.warning(f"Could not reattach to running Chrome, relaunching: {e}")
+        self.quit()
+        time.sleep(2)
+        self.create_driver()
+        return self.initialize_whatsapp()
+
     def initialize_whatsapp(self) -> bool:
         """Initialize WhatsApp Web and wait for it to be ready."""
         try:
+            # An attached Chrome may already show WhatsApp; don't mistake the old page for the reloaded one
+            previous = self.ready_element() if self.attached else None
             self.driver.get("https://web.whatsapp.com/")
-            WebDriverWait(self.driver, self.config.LOGIN_TIMEOUT).until(
+            if previous is not None:
+                self.login_wait.until(EC.staleness_of(previous))
+            self.login_wait.until(
                 EC.presence_of_element_located(
                     # (By.XPATH, "//p[contains(@class, 'selectable-text')][1]")
-                    (By.CSS_SELECTOR, "button[aria-label*='New chat']")
+                    self.READY_LOCATOR
                 )
                 # <button aria-expanded="false" aria-disabled="false" role="button" tabindex="0" class="x78zum5 x6s0dn4 x1afcbsf x1heor9g x1o1ewxj x3x9cwd x1e5q0jg x13rtm0m x1y1aw1k x1sxyh0 xwib8y2 xurb0ha xtnn1bt x9v5kkp xmw7ebm xrdum7p" data-tab="2" 
                 # title="New chat" aria-label="New chat"><span aria-hidden="true" data-icon="new-chat-outline" class=""><svg viewBox="0 0 24 24" height="24" width="24" preserveAspectRatio="xMidYMid meet" class="" fill="none"><title>new-chat-outline</title><path d="M9.53277 12.9911H11.5086V14.9671C11.5086 15.3999 11.7634 15.8175 12.1762 15.9488C12.8608 16.1661 13.4909 15.6613 13.4909 15.009V12.9911H15.4672C15.9005 12.9911 16.3181 12.7358 16.449 12.3226C16.6659 11.6381 16.1606 11.0089 15.5086 11.0089H13.4909V9.03332C13.4909 8.60007 13.2361 8.18252 12.8233 8.05119C12.1391 7.83391 11.5086 8.33872 11.5086 8.991V11.0089H9.49088C8.83941 11.0089 8.33411 11.6381 8.55097 12.3226C8.68144 12.7358 9.09947 12.9911 9.53277 12.9911Z" fill="currentColor" data-darkreader-inline-fill="" style="--darkreader-inline-fill: currentColor;"></path><path fill-rule="evenodd" clip-rule="evenodd" d="M0.944298 5.52617L2.99998 8.84848V17.3333C2.99998 18.8061 4.19389 20 5.66665 20H19.3333C20.8061 20 22 18.8061 22 17.3333V6.66667C22 5.19391 20.8061 4 19.3333 4H1.79468C1.01126 4 0.532088 4.85997 0.944298 5.52617ZM4.99998 8.27977V17.3333C4.99998 17.7015 5.29845 18 5.66665 18H19.3333C19.7015 18 20 17.7015 20 17.3333V6.66667C20 6.29848 19.7015 6 19.3333 6H3.58937L4.99998 8.27977Z" fill="currentColor" data-darkreader-inline-fill="" style="--darkreader-inline-fill: currentColor;"></path></svg></span></button>
@@ -197,13 +454,61 @@ class WhatsAppDriver:
             logging.error(f"Failed to initialize WhatsApp Web: {e}")
             return False
 
+    def cdp(self, cmd: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a raw Chrome DevTools Protocol command over the driver's session."""
+        return self.driver.execute_cdp_cmd(cmd, params or {})
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def focus_expression(locator: tuple) -> str:
+        """Build (once per locator) the JavaScript that focuses the element matching a (By, selector) locator."""
+        by, selector = locator
+        if by == By.XPATH:
+            lookup = f"document.evaluate({json.dumps(selector)}, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue"
+        else:
+            lookup = f"document.querySelector({json.dumps(selector)})"
+        # Text paragraphs aren't focusable themselves; focus their contenteditable host
+        return (
+            f"(() => {{ const el = {lookup}; if (!el) return false; "
+            "(el.closest('[contenteditable=\"true\"]') || el).focus(); return true; })()"
+        )
+
+    def focus(self, locator: tuple) -> bool:
+        """Focus the element matching a (By, selector) locator in a single Runtime.evaluate."""
+        expression = self.focus_expression(locator)
+        result = self.cdp("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+        return bool(result.get("result", {}).get("value"))
+
+    def insert_text(self, text: str) -> None:
+        """Insert text at the focused element, like an IME commit."""
+        self.cdp("Input.insertText", {"text": text})
+
+    def press_key(self, keys: str) -> None:
+        """Dispatch a key chord from CDP_KEY_EVENTS to the focused element."""
+        event = CDP_KEY_EVENTS[keys]
+        self.cdp("Input.dispatchKeyEvent", {"type": "keyDown", **event})
+        self.cdp("Input.dispatchKeyEvent", {"type": "keyUp", **{k: v for k, v in event.items() if k not in ("text", "commands")}})
+
     def quit(self) -> None:
-        """Safely quit the driver."""
+        """Safely quit the driver and close its Chrome."""
         if self.driver:
+            browser_closed = False
+            if self.attached:
+                # ChromeDriver does not close a browser it only attached to; close it over CDP
+                try:
+                    self.cdp("Browser.close")
+                    browser_closed = True
+                except Exception as e:
+                    logging.warning(f"Could not close attached Chrome: {e}")
             try:
                 self.driver.quit()
+                self.driver = None
             except Exception as e:
-                logging.error(f"Error while quitting driver: {e}")
+                if browser_closed:
+                    # Expected once the browser is gone; nothing is left running
+                    self.driver = None
+                else:
+                    logging.error(f"Error while quitting driver: {e}")
 
     def cleanup(self):
         """No cleanup needed as we're using the existing profile."""
@@ -217,46 +522,85 @@ class ContactManager:
         self.sent_numbers: Set[str] = set()
         self.supported_encodings = ['utf-8', 'latin1', 'cp1252', 'utf-16']
         self.supported_extensions = ['.csv', '.xlsx', '.xls']
-        self.required_packages = {
-            '.xlsx': 'openpyxl',
-            '.xls': 'xlrd'
-        }
+        self.required_columns = ['First Name', 'Mobile Phone', 'Message']
+        self.required_packages = config.REQUIRED_PACKAGES
         self.progress_file = get_resource_path('progress.json')
+        self.sent_log_file = get_resource_path('sent.jsonl')
+        self._sent_log = None
+        self._dirty = 0  # Progress updates not yet written to progress_file
         self.last_successful_index = 0
         self.progress_data = self.load_progress()
 
     def load_progress(self) -> dict:
-        """Load progress data from JSON file."""
+        """Load progress data from JSON file, plus any sends only recorded in the sent log."""
+        data = {}
         try:
             if self.progress_file.exists():
-                with open(self.progress_file, 'r') as f:
+                with open(self.progress_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     logging.info(f"Loaded progress data from: {self.progress_file}")
-                    return data
-            logging.info("No progress file found. Starting fresh.")
-            return {}
+            else:
+                logging.info("No progress file found. Starting fresh.")
         except Exception as e:
             logging.error(f"Error loading progress: {e}")
-            return {}
+
+        # Recover sends that never made it into the progress file (e.g. after a crash)
+        recovered = {phone: entry for phone, entry in self.load_sent_log().items() if phone not in data}
+        if recovered:
+            logging.info(f"Recovered {len(recovered)} sent contact(s) from: {self.sent_log_file}")
+            data.update(recovered)
+
+        # (phone, name, message) of every processed contact, for O(1) "already done" checks
+        self._done_set: Set[tuple] = {
+            (phone, entry.get('name'), entry.get('message')) for phone, entry in data.items()
+        }
+        return data
+
+    def load_sent_log(self) -> Dict[str, dict]:
+        """Load successful sends from the append-only sent log (one JSON object per line)."""
+        entries = {}
+        try:
+            if self.sent_log_file.exists():
+                with open(self.sent_log_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Torn last line from an interrupted write
+                        entries[entry['phone']] = {
+                            'name': entry['name'],
+                            'message': entry['message'],
+                            'index': entry['index']
+                        }
+        except Exception as e:
+            logging.error(f"Error loading sent log: {e}")
+        return entries
+
+    def record_sent(self, index: int, name: str, phone: str, message: str) -> None:
+        """Append a successful send to the sent log."""
+        try:
+            if self._sent_log is None:
+                self._sent_log = open(self.sent_log_file, 'a', encoding='utf-8', buffering=1)
+            entry = {'phone': phone, 'name': name, 'message': message, 'index': index}
+            self._sent_log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logging.error(f"Error writing sent log: {e}")
 
     def compare_with_excel(self, contacts_df: pd.DataFrame) -> tuple:
         """Compare progress data with Excel data and return matching information."""
         matches = []
         mismatches = []
         
-        for _, row in contacts_df.iterrows():
-            name = row['First Name'].strip()
-            phone = self.clean_phone_number(row['Mobile Phone'])
-            message = row['Message']
-            
+        names = contacts_df['First Name'].str.strip().to_numpy()
+        phones = contacts_df['Cleaned Phone'].to_numpy()
+        messages = contacts_df['Message'].to_numpy()
+
+        for name, phone, message in zip(names, phones, messages):
             # Check if this contact exists in progress data
-            if phone in self.progress_data:
-                progress_entry = self.progress_data[phone]
-                if (progress_entry.get('name') == name and 
-                    progress_entry.get('message') == message):
-                    matches.append((name, phone))
-                else:
-                    mismatches.append((name, phone, "Message or name changed"))
+            if (phone, name, message) in self._done_set:
+                matches.append((name, phone))
+            elif phone in self.progress_data:
+                mismatches.append((name, phone, "Message or name changed"))
             else:
                 mismatches.append((name, phone, "Not in progress file"))
         
@@ -271,62 +615,91 @@ class ContactManager:
                 shutil.copy2(self.progress_file, backup_file)
                 self.progress_file.unlink()
                 logging.info(f"Created backup of progress file at: {backup_file}")
+
+            if self._sent_log is not None:
+                self._sent_log.close()
+                self._sent_log = None
+            if self.sent_log_file.exists():
+                sent_log_backup = self.sent_log_file.with_suffix('.jsonl.bak')
+                os.replace(self.sent_log_file, sent_log_backup)
+                logging.info(f"Created backup of sent log at: {sent_log_backup}")
             
             self.progress_data = {}
+            self._dirty = 0
+            self._done_set.clear()
             self.last_successful_index = 0
             self.sent_numbers.clear()
             logging.info("Progress has been reset. All contacts will be processed.")
         except Exception as e:
             logging.error(f"Error resetting progress: {e}")
 
-    def save_progress(self, index: int, name: str, phone: str, message: str) -> None:
-        """Save progress data including contact details."""
+    def already_sent(self, phone: str, name: str, message: str) -> bool:
+        """Check whether this phone was already processed with the same name and message."""
+        return (phone, name, message) in self._done_set
+
+    def save_progress(self, index: int, name: str, phone: str, message: str, force: bool = False) -> None:
+        """Record progress for a contact, writing it to disk every PROGRESS_FLUSH_INTERVAL updates."""
         try:
+            previous = self.progress_data.get(phone)
+            if previous is not None:
+                self._done_set.discard((phone, previous.get('name'), previous.get('message')))
             self.progress_data[phone] = {
                 'name': name,
                 'message': message,
                 'index': index
             }
-            with open(self.progress_file, 'w') as f:
-                json.dump(self.progress_data, f, indent=2)
-            logging.info(f"Saved progress for {name} ({phone})")
+            self._done_set.add((phone, name, message))
+            self._dirty += 1
+            logging.info(f"Recorded progress for {name} ({phone})")
         except Exception as e:
             logging.error(f"Error saving progress: {e}")
+        if force or self._dirty >= self.config.PROGRESS_FLUSH_INTERVAL:
+            self.flush_progress()
 
-    def install_required_package(self, package_name: str) -> bool:
-        """Install required package using pip."""
+    def flush_progress(self) -> None:
+        """Atomically write progress data to disk if there are unsaved updates."""
+        if not self._dirty:
+            return
         try:
-            import subprocess
-            import sys
-            logging.info(f"Installing required package: {package_name}")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-            logging.info(f"Successfully installed {package_name}")
-            return True
+            tmp_file = self.progress_file.with_suffix('.tmp')
+            if orjson is not None:
+                tmp_file.write_bytes(orjson.dumps(self.progress_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.progress_data, f, indent=2)
+            os.replace(tmp_file, self.progress_file)
+            logging.info(f"Saved progress ({self._dirty} update(s)) to: {self.progress_file}")
+            self._dirty = 0
         except Exception as e:
-            logging.error(f"Failed to install {package_name}: {e}")
-            return False
-
-    def ensure_dependencies(self, file_extension: str) -> bool:
-        """Ensure all required dependencies are installed."""
-        if file_extension in self.required_packages:
-            package_name = self.required_packages[file_extension]
-            try:
-                __import__(package_name)
-            except ImportError:
-                return self.install_required_package(package_name)
-        return True
+            logging.error(f"Error saving progress: {e}")
 
     def detect_file_encoding(self, file_path: str) -> str:
-        """Detect the encoding of the file."""
-        encodings = self.supported_encodings
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    f.read()
-                return encoding
-            except UnicodeDecodeError:
-                continue
-        return 'utf-8'  # Default to utf-8 if no encoding works
+        """Detect the encoding of the file from a small sample of its bytes."""
+        with open(file_path, 'rb') as f:
+            sample = f.read(65536)
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        try:
+            # Most contact exports are UTF-8/ASCII; confirming that is far cheaper than detection.
+            # The incremental decoder tolerates a multi-byte character cut off at the sample's end.
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+        try:
+            import charset_normalizer
+        except ImportError:
+            # Optional dependency missing: try each supported encoding on the whole file
+            for encoding in self.supported_encodings:
+                try:
+                    with open(file_path, 'r', encoding=encoding) as f:
+                        f.read()
+                    return encoding
+                except UnicodeDecodeError:
+                    continue
+            return 'utf-8'  # Default to utf-8 if no encoding works
+        best = charset_normalizer.from_bytes(sample).best()
+        return best.encoding if best else 'utf-8'  # Default to utf-8 if nothing matches
 
     def load_contacts(self) -> Optional[pd.DataFrame]:
         """Load contacts from file (CSV or Excel) with automatic encoding detection."""
@@ -338,10 +711,12 @@ class ContactManager:
                 logging.error(f"Unsupported file format. Supported formats: {', '.join(self.supported_extensions)}")
                 return None
 
-            # Ensure required dependencies are installed
-            if not self.ensure_dependencies(file_extension):
-                logging.error("Failed to install required dependencies")
-                return None
+            # Only parse the required columns (headers may carry stray whitespace), all as plain strings
+            read_kwargs = {
+                'usecols': lambda col: str(col).strip() in self.required_columns,
+                'dtype': str,
+                'na_filter': False,
+            }
 
             if file_extension == '.csv':
                 # Try different encodings for CSV
@@ -349,38 +724,36 @@ class ContactManager:
                 logging.info(f"Detected encoding: {encoding}")
                 
                 try:
-                    excel = pd.read_csv(file_path, encoding=encoding)
+                    excel = pd.read_csv(file_path, encoding=encoding, engine='c', **read_kwargs)
                 except Exception as e:
                     logging.error(f"Error reading CSV with {encoding} encoding: {e}")
                     # Try with error handling
-                    excel = pd.read_csv(file_path, encoding=encoding, errors='replace')
+                    excel = pd.read_csv(file_path, encoding=encoding, encoding_errors='replace', engine='c', **read_kwargs)
             else:
                 # For Excel files
                 try:
-                    excel = pd.read_excel(file_path)
+                    excel = pd.read_excel(file_path, engine=self.required_packages[file_extension], **read_kwargs)
                 except Exception as e:
                     logging.error(f"Error reading Excel file: {e}")
                     return None
 
-            if excel.empty:
-                logging.error("The contacts file is empty.")
-                return None
-
             # Clean column names
             excel.columns = excel.columns.str.strip()
             
             # Validate required columns
-            required_columns = ['First Name', 'Mobile Phone', 'Message']
-            missing_columns = [col for col in required_columns if col not in excel.columns]
+            missing_columns = [col for col in self.required_columns if col not in excel.columns]
             
             if missing_columns:
                 logging.error(f"Missing required columns: {', '.join(missing_columns)}")
                 return None
 
+            if excel.empty:
+                logging.error("The contacts file is empty.")
+                return None
+
             # Clean data
-            excel['First Name'] = excel['First Name'].astype(str).str.strip()
-            excel['Mobile Phone'] = excel['Mobile Phone'].astype(str)
-            excel['Message'] = excel['Message'].astype(str)
+            excel['First Name'] = excel['First Name'].str.strip()
+            excel['Cleaned Phone'] = self.clean_phone_numbers(excel['Mobile Phone'])
 
             logging.info(f"Contacts loaded successfully. Total contacts: {len(excel)}")
             return excel
@@ -393,22 +766,78 @@ class ContactManager:
             return None
 
     def clean_phone_number(self, number: str) -> str:
-        """Clean and format phone number."""
-        # Remove all non-numeric characters except '+'
-        cleaned = ''.join(c for c in str(number) if c.isdigit() or c == '+')
-        # Remove any leading zeros after the country code
-        if cleaned.startswith('+'):
-            country_code = cleaned[:cleaned.find('0', 1) if '0' in cleaned[1:] else len(cleaned)]
-            number_part = cleaned[len(country_code):].lstrip('0')
-            return country_code + number_part
-        return cleaned.lstrip('0')
+        """Clean and format a single phone number (load_contacts precomputes 'Cleaned Phone')."""
+        return PHONE_ZEROS_RE.sub(r'\1', PHONE_JUNK_RE.sub('', str(number)))
+
+    @staticmethod
+    def clean_phone_numbers(numbers: pd.Series) -> pd.Series:
+        """Clean and format a whole column of phone numbers (vectorized clean_phone_number)."""
+        return (
+            numbers.astype(str)
+            .str.replace(PHONE_JUNK_RE, '', regex=True)
+            .str.replace(PHONE_ZEROS_RE, r'\1', regex=True)
+        )
 
 class MessageSender:
     """Handles sending messages to WhatsApp contacts."""
+
+    # Locators
+    SEARCH_BOX_LOCATOR = (By.CSS_SELECTOR, "div[contenteditable='true'][data-tab='3']")
+    SEARCH_RESULT_LOCATOR = (By.XPATH, "//div[contains(@aria-label, 'Search results')][1]")
+    # Second role=listitem in document order; CSS :nth-of-type would count sibling divs of any role
+    SEARCH_ITEM_LOCATOR = (By.XPATH, "(//div[contains(@aria-label, 'Search results')]//div[@role='listitem'])[2]")
+    MESSAGE_BOX_LOCATOR = (
+        By.CSS_SELECTOR,
+        "div[aria-label*='Type a message'][aria-owns='emoji-suggestion'] > p[class*='selectable-text']"
+    )
+
+    # True once the search results mention the typed number (digits only, ignoring formatting)
+    RESULTS_SHOW_NUMBER_JS = (
+        "const box = document.querySelector(\"div[aria-label*='Search results']\");"
+        "return !!box && box.textContent.replace(/\\D/g, '').includes(arguments[0]);"
+    )
+
+    # True once the open chat's header mentions arguments[0] (digits only, ignoring formatting)
+    HEADER_SHOWS_NUMBER_JS = (
+        "const header = document.querySelector('#main header');"
+        "return !!header && header.textContent.replace(/\\D/g, '').includes(arguments[0]);"
+    )
+
+    # data-id of the newest outgoing message in the open chat (null when it has none)
+    LAST_OUTGOING_ID_JS = (
+        "const out = document.querySelectorAll(\"div[class*='message-out']\");"
+        "const last = out[out.length - 1];"
+        "return last ? (last.closest('[data-id]') || last).getAttribute('data-id') : null;"
+    )
+    # True once an outgoing message other than arguments[0] is newest and shows a tick, not the pending clock
+    NEW_MESSAGE_SENT_JS = (
+        "const out = document.querySelectorAll(\"div[class*='message-out']\");"
+        "const last = out[out.length - 1];"
+        "if (!last) return false;"
+        "const id = (last.closest('[data-id]') || last).getAttribute('data-id');"
+        "if (!id || id === arguments[0]) return false;"
+        "return !last.querySelector(\"span[data-icon='msg-time']\") && "
+        "!!last.querySelector(\"span[data-icon='msg-check'], span[data-icon='msg-dblcheck']\");"
+    )
+
+    # Elements that survive across contacts; search results are re-rendered per search
+    CACHED_LOCATORS = frozenset({SEARCH_BOX_LOCATOR, MESSAGE_BOX_LOCATOR})
+
+    # Broader XPath equivalents, tried only when the primary locator finds nothing
+    FALLBACK_LOCATORS = {
+        SEARCH_BOX_LOCATOR: (By.XPATH, "//p[contains(@class, 'selectable-text')][1]"),
+        SEARCH_ITEM_LOCATOR: (By.XPATH, "(.//div[@role='listitem'])[2]"),
+    }
     
     def __init__(self, driver: WhatsAppDriver, config: Config):
         self.driver = driver
         self.config = config
+        self._elem_cache: Dict[tuple, WebElement] = {}
+        self._cache_session: Optional[str] = None  # WebDriver session the cached handles belong to
+        self.last_send_confirmed = False  # Whether the last type_and_send saw its message leave the browser
+        # (previous chat's composer, digits of the number being opened), set by open_chat for type_and_send
+        self._chat_switch: Optional[tuple] = None
+        from winotify import Notification  # Only needed once sending starts
         self.toast = Notification(
             app_id="WhatsApp Automation",
             title="WhatsApp Automation",
@@ -426,8 +855,20 @@ class MessageSender:
         except Exception as e:
             logging.error(f"Failed to show notification: {e}")
 
+    def wait_for(self, condition, timeout: Optional[float] = None) -> Union[WebElement, bool]:
+        """Wait for an expected condition, returning its result or False on timeout."""
+        if timeout is None or timeout == self.config.ELEMENT_WAIT_TIMEOUT:
+            wait = self.driver.short_wait
+        else:
+            wait = WebDriverWait(self.driver.driver, timeout, poll_frequency=self.config.POLL_INTERVAL)
+        try:
+            return wait.until(condition)
+        except TimeoutException:
+            logging.warning("Timed out waiting for page condition, continuing anyway...")
+            return False
+
     @staticmethod
-    def retry_on_stale(max_retries: int = 5, retry_delay: int = 2):
+    def retry_on_stale(max_retries: int = 5, retry_delay: float = 0.05):
         """Decorator for retrying operations on stale elements."""
         def decorator(func):
             def wrapper(self, *args, **kwargs):
@@ -445,11 +886,72 @@ class MessageSender:
                             # self.show_notification("Error", error_msg, error=True)
                             return False
                         logging.warning(f"Stale element, retrying ({attempt+1}/{max_retries})...")
-                        time.sleep(retry_delay)
+                        time.sleep(backoff_delay(attempt, base=retry_delay))
                 return False
             return wrapper
         return decorator
 
+    def candidates(self, locator: tuple) -> tuple:
+        """Return the locator followed by its XPath fallback, if it has one."""
+        fallback = self.FALLBACK_LOCATORS.get(locator)
+        return (locator, fallback) if fallback else (locator,)
+
+    def wait_for_any(self, condition, locator: tuple, *args) -> Union[WebElement, bool]:
+        """wait_for a locator-based condition that may be met through the locator's fallback."""
+        return self.wait_for(EC.any_of(*(condition(candidate, *args) for candidate in self.candidates(locator))))
+
+    def wait_and_cache(self, condition, locator: tuple) -> Union[WebElement, bool]:
+        """wait_for_any and keep the element it resolved, so the next interaction skips find_element."""
+        element = self.wait_for_any(condition, locator)
+        if isinstance(element, WebElement):
+            self._elem_cache[locator] = element
+        return element
+
+    def current_element(self, locator: tuple) -> Optional[WebElement]:
+        """Return the element matching a locator (or its fallback) right now, or None, without waiting."""
+        for candidate in self.candidates(locator):
+            elements = self.driver.driver.find_elements(*candidate)
+            if elements:
+                return elements[0]
+        return None
+
+    def find_cached(self, locator: tuple) -> WebElement:
+        """Return the cached element for a stable locator, looking it up on first use.
+
+        Handles left by wait_and_cache for other locators are used once and then dropped.
+        """
+        if self._cache_session != self.driver.driver.session_id:
+            # Handles are only valid in the session that found them; drop them after a reattach
+            self._elem_cache.clear()
+            self._cache_session = self.driver.driver.session_id
+        if locator in self.CACHED_LOCATORS:
+            element = self._elem_cache.get(locator)
+        else:
+            element = self._elem_cache.pop(locator, None)
+        if element is None:
+            try:
+                element = self.driver.driver.find_element(*locator)
+            except NoSuchElementException:
+                if locator not in self.FALLBACK_LOCATORS:
+                    raise
+                element = self.driver.driver.find_element(*self.FALLBACK_LOCATORS[locator])
+            if locator in self.CACHED_LOCATORS:
+                self._elem_cache[locator] = element
+        return element
+
+    @staticmethod
+    def _apply_action(element: WebElement, action: str, *args) -> None:
+        """Perform a Selenium element action."""
+        if action == "click":
+            element.click()
+        elif action == "actions":
+            # args[0] builds an ActionChains sequence for the element; perform() sends it in one request
+            args[0](ActionChains(element.parent), element).perform()
+        elif action == "send_keys":
+            element.send_keys(*args)
+        elif action == "clear":
+            element.clear()
+
     def safe_element_interaction(self, locator, action, *args, **kwargs):
         for attempt in range(self.config.MAX_RETRIES):
             # Check skip event before each attempt
@@ -468,7 +970,17 @@ class MessageSender:
                     should_skip_event.clear()
                     return "skip"
 
-                element = self.driver.driver.find_element(*locator)
+                if action in ("type", "press"):
+                    # Raw CDP input: focus via Runtime.evaluate, no WebElement round-trips
+                    if not any(self.driver.focus(candidate) for candidate in self.candidates(locator)):
+                        raise NoSuchElementException(f"No element found for locator: {locator[1]}")
+                    if action == "type":
+                        self.driver.insert_text(*args)
+                    else:
+                        self.driver.press_key(*args)
+                    return True
+
+                element = self.find_cached(locator)
 
                 # Check skip event after Selenium call
                 if should_skip_event.is_set():
@@ -476,24 +988,19 @@ class MessageSender:
                     should_skip_event.clear()
                     return "skip"
 
-                if action == "click":
-                    element.click()
-                elif action == "send_keys":
-                    element.send_keys(*args)
-                elif action == "clear":
-                    element.clear()
+                try:
+                    self._apply_action(element, action, *args)
+                except StaleElementReferenceException:
+                    if locator not in self._elem_cache:
+                        raise
+                    # Cached handle went stale after a re-render; re-resolve once
+                    del self._elem_cache[locator]
+                    self._apply_action(self.find_cached(locator), action, *args)
                 return True
             except (StaleElementReferenceException, NoSuchElementException, TimeoutException, WebDriverException) as e:
                 error_str = str(e)
                 # Check for critical connection/session errors
-                if (
-                    'failed to establish a new connection' in error_str.lower() or
-                    'max retries exceeded' in error_str.lower() or
-                    'actively refused' in error_str.lower() or
-                    'invalid session id' in error_str.lower() or
-                    'browser has closed the connection' in error_str.lower() or
-                    'not connected to devtools' in error_str.lower()
-                ):
+                if SESSION_ERROR_RE.search(error_str):
                     logging.info("Session error detected, restarting browser session to maintain continuity.")
                     if self.driver.refresh_session():
                         logging.info("Session recovered successfully")
@@ -509,75 +1016,104 @@ class MessageSender:
                     logging.error("\n" + "*"*50 + f"\n{error_msg}")
                     return False
                 logging.warning("\n" + "*"*50 + f"\nException during {action} ({type(e).__name__}), retrying ({attempt+1}/{self.config.MAX_RETRIES})...")
-                for _ in range(int(self.config.RETRY_DELAY * 10)):
-                    if should_skip_event.is_set():
-                        logging.info("Skip event detected during retry wait. Skipping contact immediately.")
-                        should_skip_event.clear()
-                        return "skip"
-                    time.sleep(0.1)
+                delay = backoff_delay(attempt, self.config.RETRY_DELAY, self.config.MAX_RETRY_DELAY)
+                if should_skip_event.wait(delay):
+                    logging.info("Skip event detected during retry wait. Skipping contact immediately.")
+                    should_skip_event.clear()
+                    return "skip"
             return False
 
-    @retry_on_stale(max_retries=3, retry_delay=1)
-    def send_message(self, contact_mobile_number: str, contact_message: str) -> bool:
-        """Send a message to a contact."""
+    @retry_on_stale(max_retries=3)
+    def open_chat(self, contact_mobile_number: str) -> bool:
+        """Search for a contact and open their chat."""
         try:
-            # Define locators
-            search_box_locator = (By.XPATH, "//p[contains(@class, 'selectable-text')][1]")
-            search_result_locator = (By.XPATH, "//div[contains(@aria-label, 'Search results')][1]")
-            search_item_locator = (By.XPATH, "(.//div[@role='listitem'])[2]")
-            message_box_locator = (
-                By.CSS_SELECTOR,
-                "div[aria-label*='Type a message'][aria-owns='emoji-suggestion'] > p[class*='selectable-text']"
-            )
-
             # Search contact
             logging.info("Attempting to find search box...")
-            result = self.safe_element_interaction(search_box_locator, "clear")
+            self.wait_and_cache(EC.element_to_be_clickable, self.SEARCH_BOX_LOCATOR)
+            # Results still on screen from the previous contact; they must be replaced before we click anything
+            old_item = self.current_element(self.SEARCH_ITEM_LOCATOR)
+            # Select-all, delete and type the number as one W3C actions request
+            result = self.safe_element_interaction(
+                self.SEARCH_BOX_LOCATOR, "actions",
+                lambda chain, search_box: (
+                    chain.click(search_box)
+                    .key_down(Keys.CONTROL).send_keys("a").key_up(Keys.CONTROL)
+                    .send_keys(Keys.DELETE)
+                    .send_keys(contact_mobile_number)
+                )
+            )
             if result == "skip":
                 return "skip"
-
-            if not self.safe_element_interaction(search_box_locator, "send_keys", Keys.CONTROL + "a"):
-                error_msg = "Could not select all text in search box"
+            if not result:
+                error_msg = "Could not search for phone number"
                 # self.show_notification("Error", error_msg, error=True)
                 return False
 
-            if not self.safe_element_interaction(search_box_locator, "send_keys", Keys.DELETE):
-                error_msg = "Could not delete text in search box"
-                # self.show_notification("Error", error_msg, error=True)
+            # Wait for the results to belong to this number: the old ones re-rendered away, or the number shown
+            digits = re.sub(r'\D', '', contact_mobile_number)
+            results_updated = [lambda driver: driver.execute_script(self.RESULTS_SHOW_NUMBER_JS, digits)]
+            if old_item is not None:
+                results_updated.append(EC.staleness_of(old_item))
+            if not self.wait_for(EC.any_of(*results_updated)):
+                logging.error(f"Search results did not update for {contact_mobile_number}; not opening a chat")
                 return False
 
-            if not self.safe_element_interaction(search_box_locator, "send_keys", contact_mobile_number):
-                error_msg = "Could not enter phone number in search box"
+            result = self.safe_element_interaction(self.SEARCH_BOX_LOCATOR, "press", Keys.ENTER)
+            if result == "skip":
+                return "skip"
+            if not result:
+                error_msg = "Could not submit phone number search"
                 # self.show_notification("Error", error_msg, error=True)
                 return False
 
-            time.sleep(2)
             if should_skip_event.is_set():
                 logging.info("Skip event detected after entering phone number. Skipping contact immediately.")
                 should_skip_event.clear()
                 return "skip"
 
-            if not self.safe_element_interaction(search_box_locator, "send_keys", Keys.ENTER):
-                error_msg = "Could not submit search"
-                # self.show_notification("Error", error_msg, error=True)
-                return False
-
             # Click search result
             logging.info("Attempting to find search results...")
-            if not self.safe_element_interaction(search_result_locator, "click"):
+            self.wait_and_cache(EC.visibility_of_element_located, self.SEARCH_RESULT_LOCATOR)
+            if not self.safe_element_interaction(self.SEARCH_RESULT_LOCATOR, "click"):
                 error_msg = "Could not click search results"
                 # self.show_notification("Error", error_msg, error=True)
                 logging.error(error_msg)
                 return False
 
             logging.info("Attempting to find specific search item...")
-            if not self.safe_element_interaction(search_item_locator, "click"):
+            self.wait_and_cache(EC.element_to_be_clickable, self.SEARCH_ITEM_LOCATOR)
+            # The open chat's composer; type_and_send must not type until it has been replaced
+            self._chat_switch = (self.current_element(self.MESSAGE_BOX_LOCATOR), digits)
+            if not self.safe_element_interaction(self.SEARCH_ITEM_LOCATOR, "click"):
                 error_msg = "Could not click search item"
                 # self.show_notification("Error", error_msg, error=True)
                 logging.error(error_msg)
                 return False
 
-            time.sleep(2)
+            return True
+
+        except (NoSuchElementException, TimeoutException,
+                ElementClickInterceptedException, ElementNotInteractableException,
+                WebDriverException) as e:
+            return self.handle_send_error(e)
+
+    @retry_on_stale(max_retries=3)
+    def type_and_send(self, contact_message: str) -> bool:
+        """Type a message into the open chat and send it."""
+        try:
+            # Make sure the chat opened by open_chat is showing, not the previous contact's
+            if self._chat_switch is not None:
+                previous_composer, digits = self._chat_switch
+                chat_switched = [lambda driver: driver.execute_script(self.HEADER_SHOWS_NUMBER_JS, digits)]
+                if previous_composer is not None:
+                    chat_switched.append(EC.staleness_of(previous_composer))
+                if not self.wait_for(EC.any_of(*chat_switched)):
+                    logging.error("The new chat did not open; not typing into the previous one")
+                    return False
+                self._chat_switch = None
+
+            # The message box is re-rendered for every chat; take the fresh handle from the wait
+            self.wait_and_cache(EC.element_to_be_clickable, self.MESSAGE_BOX_LOCATOR)
             if should_skip_event.is_set():
                 logging.info("Skip event detected before message box interaction. Skipping contact immediately.")
                 should_skip_event.clear()
@@ -585,177 +1121,87 @@ class MessageSender:
 
             # Send message
             logging.info("Attempting to find message box...")
-            if not self.safe_element_interaction(message_box_locator, "click"):
+            if not self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "click"):
                 error_msg = "Could not click message box"
                 # self.show_notification("Error", error_msg, error=True)
                 logging.error(error_msg)
                 return False
 
-            time.sleep(2)
             if should_skip_event.is_set():
                 logging.info("Skip event detected before clearing message box. Skipping contact immediately.")
                 should_skip_event.clear()
                 return "skip"
 
             # Clear message box thoroughly
-            if not self.safe_element_interaction(message_box_locator, "clear"):
+            if not self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "clear"):
                 error_msg = "Could not clear message box"
                 # self.show_notification("Error", error_msg, error=True)
                 return False
 
-            if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.CONTROL + "a"):
+            if not self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "press", Keys.CONTROL + "a"):
                 error_msg = "Could not select all text in message box"
                 # self.show_notification("Error", error_msg, error=True)
                 return False
 
-            if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.DELETE):
+            if not self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "press", Keys.DELETE):
                 error_msg = "Could not delete text in message box"
                 # self.show_notification("Error", error_msg, error=True)
                 return False
 
-            time.sleep(1)
             if should_skip_event.is_set():
                 logging.info("Skip event detected before composing message. Skipping contact immediately.")
                 should_skip_event.clear()
                 return "skip"
 
-            # Handle multi-line messages using clipboard
-            try:
-                lines = contact_message.split('\n')
-                for i, line in enumerate(lines):
-                    if should_skip_event.is_set():
-                        logging.info("Skip event detected during message composition. Skipping contact immediately.")
-                        should_skip_event.clear()
-                        return "skip"
-                    if line.strip():  # Only process non-empty lines
-                        # Use clipboard to paste the text
-                        script = f"""
-                        function setClipboard(text) {{
-                            const input = document.createElement('textarea');
-                            input.value = text;
-                            document.body.appendChild(input);
-                            input.select();
-                            document.execCommand('copy');
-                            document.body.removeChild(input);
-                        }}
-                        setClipboard(`{line}`);
-                        """
-                        self.driver.driver.execute_script(script)
-                        time.sleep(0.5)
-                        if should_skip_event.is_set():
-                            logging.info("Skip event detected during message composition. Skipping contact immediately.")
-                            should_skip_event.clear()
-                            return "skip"
-                        # Paste the text using keyboard shortcut
-                        if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.CONTROL + "v"):
-                            logging.warning(f"Failed to paste line {i+1}, trying alternative method")
-                            # Alternative method if paste fails
-                            if not self.safe_element_interaction(message_box_locator, "send_keys", line):
-                                error_msg = f"Failed to send line {i+1}"
-                                # self.show_notification("Error", error_msg, error=True)
-                                logging.error(error_msg)
-                                return False
-
-                    if i < len(lines) - 1:  # If not the last line
-                        if should_skip_event.is_set():
-                            logging.info("Skip event detected during new line. Skipping contact immediately.")
-                            should_skip_event.clear()
-                            return "skip"
-                        if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.SHIFT + Keys.ENTER):
-                            error_msg = "Could not add new line"
-                            # self.show_notification("Error", error_msg, error=True)
-                            return False
-                        time.sleep(0.5)
-
-                time.sleep(1)
-                if should_skip_event.is_set():
-                    logging.info("Skip event detected before sending message. Skipping contact immediately.")
-                    should_skip_event.clear()
-                    return "skip"
-                # Send the message
-                if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.ENTER):
-                    error_msg = "Could not send message"
-                    # self.show_notification("Error", error_msg, error=True)
-                    return False
+            # Insert the whole (multi-line) message with one CDP Input.insertText call
+            result = self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "type", contact_message)
+            if result == "skip":
+                return "skip"
+            if not result:
+                error_msg = "Could not enter message"
+                # self.show_notification("Error", error_msg, error=True)
+                logging.error(error_msg)
+                return False
 
-                # self.show_notification("Success", "Message sent successfully!")
-                return True
+            if should_skip_event.is_set():
+                logging.info("Skip event detected before sending message. Skipping contact immediately.")
+                should_skip_event.clear()
+                return "skip"
+            # Remember the newest outgoing message so the new one can be told apart from it
+            self.last_send_confirmed = False
+            previous_id = self.driver.driver.execute_script(self.LAST_OUTGOING_ID_JS)
 
-            except Exception as e:
-                error_msg = f"Error in message sending method: {str(e)}"
+            # Send the message
+            if not self.safe_element_interaction(self.MESSAGE_BOX_LOCATOR, "press", Keys.ENTER):
+                error_msg = "Could not send message"
                 # self.show_notification("Error", error_msg, error=True)
-                logging.error(error_msg)
-                # Fallback to simple character-by-character method
-                try:
-                    lines = contact_message.split('\n')
-                    for i, line in enumerate(lines):
-                        if should_skip_event.is_set():
-                            logging.info("Skip event detected during fallback message composition. Skipping contact immediately.")
-                            should_skip_event.clear()
-                            return "skip"
-                        if line.strip():  # Only process non-empty lines
-                            # Try sending the line as a whole first
-                            if not self.safe_element_interaction(message_box_locator, "send_keys", line):
-                                # If that fails, try character by character
-                                for char in line:
-                                    if should_skip_event.is_set():
-                                        logging.info("Skip event detected during fallback char send. Skipping contact immediately.")
-                                        should_skip_event.clear()
-                                        return "skip"
-                                    if not self.safe_element_interaction(message_box_locator, "send_keys", char):
-                                        logging.warning(f"Failed to send character, continuing with next")
-                                    time.sleep(0.1)
-                        
-                        if i < len(lines) - 1:  # If not the last line
-                            if should_skip_event.is_set():
-                                logging.info("Skip event detected during fallback new line. Skipping contact immediately.")
-                                should_skip_event.clear()
-                                return "skip"
-                            if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.SHIFT + Keys.ENTER):
-                                error_msg = "Could not add new line in fallback method"
-                                # self.show_notification("Error", error_msg, error=True)
-                                return False
-                            time.sleep(0.5)
-
-                    time.sleep(1)
-                    if should_skip_event.is_set():
-                        logging.info("Skip event detected before sending message in fallback. Skipping contact immediately.")
-                        should_skip_event.clear()
-                        return "skip"
-                    # Send the message
-                    if not self.safe_element_interaction(message_box_locator, "send_keys", Keys.ENTER):
-                        error_msg = "Could not send message in fallback method"
-                        # self.show_notification("Error", error_msg, error=True)
-                        return False
-
-                    # self.show_notification("Success", "Message sent successfully using fallback method!")
-                    return True
-                except Exception as e2:
-                    error_msg = f"Error in fallback message sending method: {str(e2)}"
-                    # self.show_notification("Error", error_msg, error=True)
-                    logging.error(error_msg)
-                    return False
+                return False
+
+            # Confirm the new message left the browser (tick instead of the pending clock)
+            self.last_send_confirmed = bool(self.wait_for(
+                lambda driver: driver.execute_script(self.NEW_MESSAGE_SENT_JS, previous_id)
+            ))
 
-        except (NoSuchElementException, TimeoutException, 
+            # self.show_notification("Success", "Message sent successfully!")
+            return True
+
+        except (NoSuchElementException, TimeoutException,
                 ElementClickInterceptedException, ElementNotInteractableException,
                 WebDriverException) as e:
-            error_str = str(e)
-            if (
-                'failed to establish a new connection' in error_str.lower() or
-                'max retries exceeded' in error_str.lower() or
-                'actively refused' in error_str.lower() or
-                'invalid session id' in error_str.lower() or
-                'browser has closed the connection' in error_str.lower() or
-                'not connected to devtools' in error_str.lower()
-            ):
-                error_msg = f"CRITICAL ERROR: {error_str}"
-                # self.show_notification("Critical Error", error_msg, error=True)
-                logging.error("\n" + "*"*50 + f"\n{error_msg}\nTerminating program immediately.")
-                sys.exit(1)
-            error_msg = f"Error sending message: {error_str}"
-            # self.show_notification("Error", error_msg, error=True)
-            logging.error("\n" + "*"*50 + f"\n{error_msg}")
-            return False
+            return self.handle_send_error(e)
+
+    def handle_send_error(self, e: Exception) -> bool:
+        """Log a Selenium error from the send flow, terminating on critical session errors."""
+        error_str = str(e)
+        if SESSION_ERROR_RE.search(error_str):
+            error_msg = f"CRITICAL ERROR: {error_str}"
+            # self.show_notification("Critical Error", error_msg, error=True)
+            logging.error("\n" + "*"*50 + f"\n{error_msg}\nTerminating program immediately.")
+            sys.exit(1)
+        error_msg = f"Error sending message: {error_str}"
+        # self.show_notification("Error", error_msg, error=True)
+        logging.error("\n" + "*"*50 + f"\n{error_msg}")
+        return False
 
 def skip_server():
     class Handler(http.server.BaseHTTPRequestHandler):
@@ -792,13 +1238,19 @@ def main():
         logging.info("2. Contacts file (contacts.xlsx) is in the same folder as this script")
         logging.info("3. Chrome browser is installed with a user profile")
         return  # <-- Make sure to return here!
+    except DependencyMissing as e:
+        logging.error(f"Configuration error: {e}")
+        return
 
     whatsapp_driver = WhatsAppDriver(config)
     contact_manager = ContactManager(config)
+    atexit.register(contact_manager.flush_progress)
     message_sender = None
+    notifier = None
 
     # Initialize tracking dictionaries
     successful_sends = {}  # phone_number: name
+    unconfirmed_sends = set()  # phone_numbers in successful_sends whose message never showed a sent tick
     failed_sends = {}      # phone_number: (name, reason)
     skipped_sends = {}     # phone_number: (name, reason)
     total_contacts = 0
@@ -823,6 +1275,8 @@ def main():
                 logging.info(f"! {name} ({phone}) - {reason}")
             logging.info("Prompting user: Continue from where we left off, Start fresh, or Exit.")
             while True:
+                # Let the background log listener finish printing before the menu and prompt appear
+                log_queue.join()
                 print("\nOptions:")
                 print("1. Continue from where we left off (skip matching contacts)")
                 print("2. Start fresh (reset progress and process all contacts)")
@@ -845,6 +1299,7 @@ def main():
             if contact_manager.progress_data:
                 logging.info("Previous progress data exists but doesn't match current contacts.")
                 while True:
+                    log_queue.join()
                     print("\nOptions:")
                     print("1. Skip previously processed contacts")
                     print("2. Start fresh (reset progress)")
@@ -852,8 +1307,7 @@ def main():
                     choice = input("\nEnter your choice (1-3): ").strip()
                     if choice == '1':
                         logging.info("User selected progress mismatch option: 1 (Skip previously processed contacts)")
-                        for phone in contact_manager.progress_data:
-                            contact_manager.sent_numbers.add(phone)
+                        contact_manager.sent_numbers.update(contact_manager.progress_data)
                         break
                     elif choice == '2':
                         logging.info("User selected progress mismatch option: 2 (Start fresh)")
@@ -865,6 +1319,33 @@ def main():
                     else:
                         print("Invalid choice. Please enter 1, 2, or 3.")
 
+        # Work out every up-front skip on the full frame, then filter it once so skipped rows never reach Selenium
+        phones = contacts_df['Cleaned Phone']
+        skip_rules = [
+            (phones.duplicated(keep='first'), "Duplicate phone number in contacts file", "duplicate phone number(s) in contacts file"),
+        ]
+        if contact_manager.sent_numbers:
+            # Numbers already marked as sent from previous progress
+            skip_rules.append((phones.isin(contact_manager.sent_numbers), "Message already sent previously", "contact(s) already sent previously"))
+        if contact_manager.progress_data:
+            # Contacts already processed with the same name and message
+            done_mask = pd.Series([
+                contact_manager.already_sent(phone, name, message)
+                for name, phone, message in zip(contacts_df['First Name'], phones, contacts_df['Message'])
+            ], index=contacts_df.index, dtype=bool)
+            skip_rules.append((done_mask, "Already processed", "contact(s) already processed with the same message"))
+
+        skip_mask = pd.Series(False, index=contacts_df.index)
+        for rule_mask, reason, description in skip_rules:
+            rule_mask = rule_mask & ~skip_mask  # Report each row under the first rule it matches
+            if rule_mask.any():
+                skipped = contacts_df.loc[rule_mask, ['First Name', 'Cleaned Phone']].itertuples(index=False, name=None)
+                skipped_sends.update({phone: (name, reason) for name, phone in skipped})
+                logging.info(f"⏭️ Skipping {int(rule_mask.sum())} {description}")
+                skip_mask |= rule_mask
+        if skip_mask.any():
+            contacts_df = contacts_df[~skip_mask]
+
         # Try to initialize WhatsApp automation
         try:
             driver = whatsapp_driver.create_driver()
@@ -879,77 +1360,75 @@ def main():
             return
 
         # Session restart logic
-        session_start_time = time.time()
+        session_deadline = time.monotonic() + SESSION_RESTART_INTERVAL
+
+        # Pipelines toast notifications alongside browser work
+        from winotify import Notification
+        notifier = ThreadPoolExecutor(max_workers=1)
 
         # Process each contact
-        for index, row in contacts_df.iterrows():
+        # Plain per-column arrays, as in compare_with_excel; no DataFrame sub-selection or row packing
+        contact_rows = zip(
+            contacts_df.index,  # Iterating the Index yields Python ints, which json can serialize
+            contacts_df['First Name'].to_numpy(),
+            contacts_df['Cleaned Phone'].to_numpy(),
+            contacts_df['Message'].to_numpy(),
+        )
+        # 'First Name' is already stripped in load_contacts, so it is used as the display name directly
+        for index, contact_name, contact_mobile_number, contact_message in contact_rows:
             current_contact = index + 1
-            contact_name = f"{row['First Name']} ".strip()
-            contact_message = row['Message']
-            contact_mobile_number = contact_manager.clean_phone_number(row['Mobile Phone'])
-
-            # Show notification with skip button
-            toast = Notification(
-                app_id="WhatsApp Automation",
-                title="Ready to send WhatsApp message",
-                msg=f"Contact: {contact_name}\nPhone: {contact_mobile_number}",
-                duration="long"
-            )
-            toast.add_actions(label="Skip", launch="http://localhost:5050/skip")
-            toast.show()
-
-            # Wait a short time for user to click skip (e.g., 3 seconds)
-            time.sleep(3)
-            if should_skip_event.is_set():
-                logging.info(f"User clicked 'Skip' notification for {contact_name} ({contact_mobile_number}). Skipping and marking as processed.")
-                skipped_sends[contact_mobile_number] = (contact_name, "User skipped via notification")
-                contact_manager.save_progress(index, contact_name, contact_mobile_number, contact_message)
-                should_skip_event.clear()
-                continue
 
             # Session restart check
             need_restart = False
-            if time.time() - session_start_time >= SESSION_RESTART_INTERVAL:
+            if time.monotonic() >= session_deadline:
                 logging.info(f"Session restart interval ({SESSION_RESTART_INTERVAL} seconds) reached, restarting browser session to maintain continuity.")
                 need_restart = True
             try:
-                
-
                 if not need_restart:
-                    # Skip if this contact matches progress data and we're continuing from previous progress
-                    if contact_mobile_number in contact_manager.progress_data:
-                        progress_entry = contact_manager.progress_data[contact_mobile_number]
-                        if (progress_entry.get('name') == contact_name and 
-                            progress_entry.get('message') == contact_message):
-                            logging.info(f"Skipping {contact_name} - already processed with same message")
-                            skipped_sends[contact_mobile_number] = (contact_name, "Already processed")
-                            continue
-
                     logging.info(f"\n{'='*50}")
                     logging.info(f"Processing contact {current_contact}/{total_contacts}")
                     logging.info(f"Name: {contact_name}")
                     logging.info(f"Phone: {contact_mobile_number}")
                     logging.info(f"{'='*50}")
 
-                    if contact_mobile_number in contact_manager.sent_numbers:
-                        skip_reason = "Message already sent previously"
-                        logging.info(f"⏭️ Skipping {contact_name}: {skip_reason}")
-                        skipped_sends[contact_mobile_number] = (contact_name, skip_reason)
-                        continue
+                # Show notification with skip button (winotify spawns PowerShell, so keep it off the driver thread)
+                toast = Notification(
+                    app_id="WhatsApp Automation",
+                    title="Ready to send WhatsApp message",
+                    msg=f"Contact: {contact_name}\nPhone: {contact_mobile_number}",
+                    duration="long"
+                )
+                toast.add_actions(label="Skip", launch="http://localhost:5050/skip")
+                notifier.submit(toast.show)
+                skip_window_end = time.monotonic() + SKIP_WINDOW
 
-                contact_manager.sent_numbers.add(contact_mobile_number)
                 logging.info(f"📤 Sending message to {contact_name}...")
 
                 try:
-                    result = message_sender.send_message(contact_mobile_number, contact_message)
+                    # Open the chat while the user still has the skip window, then wait out what's left of it
+                    result = message_sender.open_chat(contact_mobile_number)
+                    if result == "skip" or (result is True and should_skip_event.wait(max(0.0, skip_window_end - time.monotonic()))):
+                        logging.info(f"User clicked 'Skip' notification for {contact_name} ({contact_mobile_number}). Skipping and marking as processed.")
+                        skipped_sends[contact_mobile_number] = (contact_name, "User skipped via notification")
+                        # Skips are not in sent.jsonl, so write them out now rather than with the next batch
+                        contact_manager.save_progress(index, contact_name, contact_mobile_number, contact_message, force=True)
+                        should_skip_event.clear()
+                        continue
+                    if result:
+                        result = message_sender.type_and_send(contact_message)
                     if result == "skip":
                         logging.info(f"User skipped {contact_name} ({contact_mobile_number}) during message sending. Marking as processed.")
                         skipped_sends[contact_mobile_number] = (contact_name, "User skipped during message sending")
-                        contact_manager.save_progress(index, contact_name, contact_mobile_number, contact_message)
+                        # Skips are not in sent.jsonl, so write them out now rather than with the next batch
+                        contact_manager.save_progress(index, contact_name, contact_mobile_number, contact_message, force=True)
                         continue
                     if result:
                         logging.info(f"✅ Message sent successfully to {contact_name}")
                         successful_sends[contact_mobile_number] = contact_name
+                        if not message_sender.last_send_confirmed:
+                            logging.warning(f"⚠️ Message to {contact_name} ({contact_mobile_number}) was sent but not confirmed by WhatsApp (no tick). Check it manually.")
+                            unconfirmed_sends.add(contact_mobile_number)
+                        contact_manager.record_sent(index, contact_name, contact_mobile_number, contact_message)
                         # Save progress with contact details
                         contact_manager.save_progress(index, contact_name, contact_mobile_number, contact_message)
                     else:
@@ -960,7 +1439,7 @@ def main():
                     error_msg = str(e)
                     logging.info(f"❌ Error sending message to {contact_name}: {error_msg}")
                     # Session error detection
-                    if 'invalid session id' in error_msg.lower() or 'browser has closed the connection' in error_msg.lower():
+                    if SESSION_LOST_RE.search(error_msg):
                         logging.info("Session error detected, restarting browser session to maintain continuity.")
                         need_restart = True
                     else:
@@ -969,13 +1448,10 @@ def main():
                 time.sleep(2)
             finally:
                 if need_restart:
-                    whatsapp_driver.quit()
-                    time.sleep(2)
-                    driver = whatsapp_driver.create_driver()
-                    if whatsapp_driver.initialize_whatsapp():
+                    if whatsapp_driver.restart_session():
                         message_sender = MessageSender(whatsapp_driver, config)
                         logging.info("WhatsApp Web re-initialized successfully after session restart.")
-                        session_start_time = time.time()
+                        session_deadline = time.monotonic() + SESSION_RESTART_INTERVAL
                     else:
                         logging.error("Failed to re-initialize WhatsApp Web after session restart.")
                         break
@@ -989,8 +1465,13 @@ def main():
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
     finally:
+        contact_manager.flush_progress()
+        if notifier:
+            notifier.shutdown(wait=False)
         if whatsapp_driver:
-            time.sleep(5)
+            if not (message_sender and message_sender.last_send_confirmed):
+                # Give the last message time to leave the browser unless it was already seen as sent
+                time.sleep(5)
             whatsapp_driver.quit()
 
         # Print summary report
@@ -999,25 +1480,47 @@ def main():
         logging.info("="*50)
         logging.info(f"Total contacts: {total_contacts}")
         logging.info(f"Successfully sent: {len(successful_sends)}")
+        logging.info(f"Sent but unconfirmed: {len(unconfirmed_sends)}")
         logging.info(f"Failed to send: {len(failed_sends)}")
         logging.info(f"Skipped: {len(skipped_sends)}")
         
+        # One log record per section rather than one (or two) per contact
         if successful_sends:
-            logging.info("\n✅ Successfully sent messages to:")
-            for phone, name in successful_sends.items():
-                logging.info(f"  • {name} ({phone})")
+            logging.info("\n✅ Successfully sent messages to:\n" + "\n".join(
+                f"  • {name} ({phone})" for phone, name in successful_sends.items()
+            ))
         
+        if unconfirmed_sends:
+            logging.info("\n⚠️ Sent but not confirmed (no tick seen, check manually):\n" + "\n".join(
+                f"  • {successful_sends[phone]} ({phone})" for phone in unconfirmed_sends
+            ))
+
         if failed_sends:
-            logging.info("\n❌ Failed to send messages to:")
-            for phone, (name, reason) in failed_sends.items():
-                logging.info(f"  • {name} ({phone})")
-                logging.info(f"    Reason: {reason}")
+            logging.info("\n❌ Failed to send messages to:\n" + "\n".join(
+                f"  • {name} ({phone})\n    Reason: {reason}" for phone, (name, reason) in failed_sends.items()
+            ))
         
         if skipped_sends:
-            logging.info("\n⏭️ Skipped contacts:")
-            for phone, (name, reason) in skipped_sends.items():
-                logging.info(f"  • {name} ({phone})")
-                logging.info(f"    Reason: {reason}")
+            logging.info("\n⏭️ Skipped contacts:\n" + "\n".join(
+                f"  • {name} ({phone})\n    Reason: {reason}" for phone, (name, reason) in skipped_sends.items()
+            ))
+
+        # Full per-contact listing in a single buffered write
+        results = (
+            [(phone, name, "sent (unconfirmed)", "No sent tick seen") if phone in unconfirmed_sends
+             else (phone, name, "sent", "") for phone, name in successful_sends.items()] +
+            [(phone, name, "failed", reason) for phone, (name, reason) in failed_sends.items()] +
+            [(phone, name, "skipped", reason) for phone, (name, reason) in skipped_sends.items()]
+        )
+        if results:
+            summary_file = get_resource_path('run_summary.csv')
+            try:
+                pd.DataFrame(results, columns=['Phone', 'Name', 'Status', 'Reason']).to_csv(
+                    summary_file, index=False, encoding='utf-8-sig'
+                )
+                logging.info(f"Run summary written to: {summary_file}")
+            except Exception as e:
+                logging.error(f"Error writing run summary: {e}")
         
         logging.info("\n" + "="*50)
         logging.info("END OF RUN")
@@ -1029,4 +1532,8 @@ if __name__ == "__main__":
     threading.Thread(target=skip_server, daemon=True).start()
     # Start the skip listener for the console in a background thread
     threading.Thread(target=skip_listener, daemon=True).start()
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # Flush any queued log records before exiting
+        log_listener.stop()
\ No newline at end of file
@@ -11,8 +11,12 @@ def build_executable():
         
         # Define paths
         script_path = current_dir / "Final_Chrome WA_AUTO.py"
-        dist_path = current_dir
+        cache_path = current_dir / ".pyinstaller_cache"
         output_name = "WA_Msg"
+        # Set WA_DEV_BUILD for quick iterative builds: a one-folder bundle reusing the cached analysis,
+        # kept under the cache directory so --noconfirm never replaces anything next to the sources
+        dev_build = bool(os.environ.get("WA_DEV_BUILD"))
+        dist_path = cache_path / "dist" if dev_build else current_dir
         
         # Verify the source file exists
         if not script_path.exists():
@@ -22,26 +26,33 @@ def build_executable():
         # Build the PyInstaller command
         cmd = [
             "pyinstaller",
-            "--onefile",
+            "--onedir" if dev_build else "--onefile",
+            "--noconfirm",
             f"--name={output_name}",
             f"--distpath={dist_path}",
-            str(script_path)
+            f"--workpath={cache_path}",
+            f"--specpath={cache_path}",
         ]
+        if not dev_build:
+            # Release builds start from a clean cache
+            cmd.append("--clean")
+        cmd.append(str(script_path))
         
         print("Building executable...")
         print(f"Command: {' '.join(cmd)}")
         
-        # Run PyInstaller
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Run PyInstaller, echoing its output as it arrives rather than buffering it all
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1) as proc:
+            for line in proc.stdout:
+                print(line, end="")
         
-        if result.returncode == 0:
+        if proc.returncode == 0:
             print("\nBuild successful!")
-            print(f"Executable created at: {dist_path / f'{output_name}.exe'}")
+            exe_dir = dist_path / output_name if dev_build else dist_path
+            print(f"Executable created at: {exe_dir / f'{output_name}.exe'}")
             return True
         else:
-            print("\nBuild failed!")
-            print("Error output:")
-            print(result.stderr)
+            print(f"\nBuild failed! (exit code {proc.returncode}, see output above)")
             return False
             
     except Exception as e: